@@ -1,7 +1,150 @@
 import os
-import json
-from typing import Dict, Any, List
-from openai import OpenAI
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import numpy as np
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+# Maximum number of help responses kept in the exact-match cache
+HELP_CACHE_SIZE = 1024
+
+# Embedding model used to match differently phrased help requests
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# The embedding is only a cache fast path, so it gets one short attempt
+EMBEDDING_TIMEOUT_SECONDS = 5
+
+# Requests that name an option ("clarify option 2") differ from each other
+# only by that number, so they skip the semantic cache and match exactly
+OPTION_NUMBER_PATTERN = re.compile(r"\b\d+\b")
+
+# Semantic cache limits: (model, question, context) keys kept, and the most
+# recent request embeddings kept per key
+SEMANTIC_CACHE_KEYS = 256
+SEMANTIC_CACHE_ENTRIES = 32
+
+# Connection pool limits for the OpenAI client shared by all sessions
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 50
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Check whether an OpenAI error is transient and worth retrying"""
+    # The SDK has already been imported by the time one of its errors is raised
+    import openai
+    return isinstance(exc, (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError))
+
+def is_persistent_error(exc: BaseException) -> bool:
+    """Check whether an OpenAI error will keep failing for every request, e.g. a bad key, model or outage"""
+    import openai
+    # Rate limits, connection failures, timeouts and 5xx responses only reach the
+    # caller once retry_transient has given up on them; a bad request stays per-request
+    return isinstance(exc, (
+        openai.AuthenticationError, openai.PermissionDeniedError, openai.NotFoundError,
+        openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError,
+        openai.InternalServerError
+    ))
+
+# Transient OpenAI errors are retried with exponential backoff
+retry_transient = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_random_exponential(min=1, max=8),
+    retry=retry_if_exception(is_transient_error),
+    reraise=True
+)
+
+# Help requests that only ask for a definition or an option clarification
+# are simple enough for the cheaper model; anything open-ended is not
+SIMPLE_HELP_PATTERN = re.compile(
+    r"\b(define|definition of|what does .+ mean|clarify option \d+)\b",
+    re.IGNORECASE
+)
+
+# Number of weakest competencies that receive improvement suggestions
+FOCUS_SKILL_COUNT = 3
+
+# Competencies at or above this performance level are left out of the prompt
+STRONG_SKILL_LEVEL = 85
+
+# Rubric items sent to the model per competency
+PROMPT_RUBRIC_ITEMS = 3
+
+# Performance levels are rounded to this step (in %) before prompting, so
+# students with near-identical results share one cached set of suggestions
+SUGGESTION_LEVEL_STEP = 10
+
+# Seconds a cached set of improvement suggestions stays valid
+SUGGESTION_CACHE_TTL = 86400
+
+# Seconds to skip OpenAI calls after a persistent failure, so repeated clicks
+# during an outage fall back immediately instead of waiting on the network again
+ERROR_BACKOFF_SECONDS = 30
+
+GENERAL_SUGGESTION = "Continue practicing procurement case studies to improve overall performance."
+
+# Static prompt prefixes. Dynamic values are never interpolated into these so
+# they stay byte-identical across calls and qualify for OpenAI prompt caching.
+HELP_SYSTEM_PROMPT = """
+You are a helpful procurement training assistant. A student is working on a procurement case study quiz and needs help with a question.
+
+Provide helpful guidance without directly revealing the answer. You can:
+- Provide hints about the approach or reasoning
+- Clarify terminology or concepts
+- Explain the context or scenario
+- Point out important factors to consider
+
+Keep your response concise and educational. Do not directly state which option(s) are correct.
+"""
+
+HELP_TEMPLATE_PROMPT = """
+The question will be sent in the next message using this template:
+
+Question: <question stem>
+
+Options:
+1. <first option>
+2. <second option>
+...
+
+Note: <multi-select instructions, if any>
+Available hints: <author hints, if any>
+
+Student's request: <what the student asked for>
+"""
+
+HELP_USER_TEMPLATE = """
+Question: {stem}
+
+Options:
+{options_block}
+{note_line}{hint_line}
+Student's request: {request}
+"""
+
+IMPROVEMENT_SYSTEM_PROMPT = """
+You are a procurement training expert providing personalized feedback. Analyze a student's quiz performance and provide personalized improvement suggestions.
+
+The next message lists the student's weaker competencies, one per line, as: skill key (label): performance level — rubric: the top improvement rubric items for that competency.
+
+For each competency, provide specific, actionable improvement suggestions based on:
+1. The student's performance level in that area
+2. The improvement rubric items provided
+3. Your expertise in procurement best practices
+
+Make suggestions practical and specific.
+
+Respond in JSON format with exactly the listed skill keys as top-level keys and improvement text as values.
+"""
+
+IMPROVEMENT_USER_TEMPLATE = """
+Performance Data:
+{performance_table}
+
+Skill keys: {skill_keys}
+"""
 
 class AIHelper:
     def __init__(self):
@@ -9,62 +152,291 @@ class AIHelper:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.client = OpenAI(api_key=api_key)
+        # The OpenAI client is created on first use, see the client property
+        self._api_key = api_key
+        self._client = None
+        self._client_lock = threading.Lock()
         # Use a reliable OpenAI model for production
         self.model = os.getenv("QUIZ_OPENAI_MODEL", "gpt-4o-mini")
+        # Cheaper, faster model for simple help requests
+        self.cheap_model = os.getenv("QUIZ_OPENAI_CHEAP_MODEL", "gpt-4.1-nano")
+        
+        # Exact-match cache of help responses, keyed by a hash of the request
+        self._help_cache: "OrderedDict[str, str]" = OrderedDict()
+        # The helper is shared across sessions, which run on separate threads
+        self._cache_lock = threading.Lock()
+        
+        # Semantic cache: per (model, question id, context hash), the stacked unit
+        # request embeddings and their responses, least recently used first
+        self.embed_cache: "OrderedDict[Tuple[str, str, str], Tuple[np.ndarray, Tuple[str, ...]]]" = OrderedDict()
+        self.semantic_threshold = float(os.getenv("QUIZ_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+        
+        # Improvement suggestions keyed by a hash of the request body, with expiry time
+        self._suggestion_cache: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        
+        # Per error class, the monotonic time until which OpenAI calls are skipped
+        self._error_until: Dict[str, float] = {}
+        self._error_lock = threading.Lock()
     
-    def get_help(self, question: Dict[str, Any], help_request: str) -> str:
-        """Get AI-powered help for a specific question"""
+    @property
+    def client(self):
+        """OpenAI client, created on first use so the SDK is only imported when needed"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI, DefaultHttpxClient, DEFAULT_CONNECTION_LIMITS
+                    
+                    # Limits come from the HTTP library bundled with the SDK, so
+                    # httpx is not imported directly.
+                    # Retries are handled by retry_transient rather than the SDK
+                    self._client = OpenAI(
+                        api_key=self._api_key,
+                        max_retries=0,
+                        http_client=DefaultHttpxClient(
+                            limits=type(DEFAULT_CONNECTION_LIMITS)(
+                                max_connections=MAX_CONNECTIONS,
+                                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+                            )
+                        )
+                    )
+        return self._client
+    
+    def _in_error_backoff(self) -> bool:
+        """Check whether a recent failure means OpenAI calls should be skipped"""
+        now = time.monotonic()
+        with self._error_lock:
+            return any(until > now for until in self._error_until.values())
+    
+    def _record_error(self, error: Exception):
+        """Skip OpenAI calls for a short while after a persistent failure"""
+        # A bad request only affects the call that made it, so it doesn't
+        # switch AI features off for every other session
+        if not is_persistent_error(error):
+            return
+        with self._error_lock:
+            self._error_until[type(error).__name__] = time.monotonic() + ERROR_BACKOFF_SECONDS
+    
+    def _record_success(self):
+        """Clear any error backoff once a call succeeds"""
+        with self._error_lock:
+            self._error_until.clear()
+    
+    def _help_cache_key(self, model: str, question_id: str, help_request_norm: str, context_hash: str) -> str:
+        """Build a deterministic cache key for a help request"""
+        raw = "\x1f".join([model, question_id, help_request_norm, context_hash])
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    def _cache_help_response(self, key: str, response: str):
+        """Store a help response, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self._help_cache[key] = response
+            self._help_cache.move_to_end(key)
+            if len(self._help_cache) > HELP_CACHE_SIZE:
+                self._help_cache.popitem(last=False)
+    
+    @retry_transient
+    def _create_completion(self, **kwargs):
+        """Create a chat completion, retrying transient failures"""
+        return self.client.chat.completions.create(**kwargs)
+    
+    def _create_embedding(self, text: str):
+        """Create an embedding in a single short attempt; a miss just skips the semantic cache"""
+        return self.client.embeddings.create(model=EMBEDDING_MODEL, input=text, timeout=EMBEDDING_TIMEOUT_SECONDS)
+    
+    def _embed_help_request(self, help_request: str) -> Optional[np.ndarray]:
+        """Embed a help request as a unit vector, or None if embedding fails"""
+        try:
+            response = self._create_embedding(help_request)
+        except Exception as e:
+            self._record_error(e)
+            return None
         
-        # Prepare context without revealing the answer
-        context = f"""
-        Question: {question['stem']}
+        vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+    
+    def _semantic_lookup(self, semantic_key: Tuple[str, str, str], vector: np.ndarray) -> Optional[str]:
+        """Return the cached response for the most similar earlier request, if close enough"""
+        with self._cache_lock:
+            entry = self.embed_cache.get(semantic_key)
+            if entry is not None:
+                self.embed_cache.move_to_end(semantic_key)
+        if entry is None:
+            return None
+        
+        matrix, responses = entry
+        similarities = matrix @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.semantic_threshold:
+            return responses[best]
+        return None
+    
+    def _help_model(self, help_request: str) -> str:
+        """Pick the model for a help request, routing simple requests to the cheap model"""
+        if SIMPLE_HELP_PATTERN.search(help_request):
+            return self.cheap_model
+        return self.model
+    
+    def _prepare_help(self, question: Dict[str, Any], help_request: str, model: str) -> Tuple[List[Dict[str, str]], str, Tuple[str, str, str], Optional[np.ndarray], Optional[str]]:
+        """Build the help messages and check the caches.
         
-        Options:
+        Returns the messages, the exact-match cache key, the semantic cache key,
+        the request embedding and the cached response (None on a cache miss).
         """
         
-        for i, option in enumerate(question['options']):
-            context += f"{i + 1}. {option}\n"
+        # Prepare context without revealing the answer
+        options_block = "\n".join(f"{i + 1}. {option}" for i, option in enumerate(question['options']))
         
+        note_line = ""
         if question['type'] == 'multi':
-            context += f"\nNote: This is a multi-select question. Select exactly {question['select_count']} options.\n"
+            note_line = f"\nNote: This is a multi-select question. Select exactly {question['select_count']} options.\n"
         
         # Add hints if available
+        hint_line = ""
         if 'hints' in question and question['hints']:
-            context += f"\nAvailable hints: {', '.join(question['hints'])}\n"
-        
-        prompt = f"""
-        You are a procurement training assistant. A student is working on a procurement case study quiz and needs help with this question.
-        
-        {context}
-        
-        Student's request: {help_request}
-        
-        Provide helpful guidance without directly revealing the answer. You can:
-        - Provide hints about the approach or reasoning
-        - Clarify terminology or concepts
-        - Explain the context or scenario
-        - Point out important factors to consider
+            hint_line = f"\nAvailable hints: {', '.join(question['hints'])}\n"
+        
+        # Only the question and request vary; the static prefix comes first
+        prompt = HELP_USER_TEMPLATE.format(
+            stem=question['stem'],
+            options_block=options_block,
+            note_line=note_line,
+            hint_line=hint_line,
+            request=help_request
+        )
+        context = "\x1f".join([question['stem'], options_block, note_line, hint_line])
+        
+        messages = [
+            {"role": "system", "content": HELP_SYSTEM_PROMPT},
+            {"role": "user", "content": HELP_TEMPLATE_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        
+        # Identical requests on the same question return the cached response
+        help_request_norm = help_request.strip().lower()
+        context_hash = hashlib.sha256(context.encode()).hexdigest()
+        cache_key = self._help_cache_key(model, str(question['id']), help_request_norm, context_hash)
+        # Question ids repeat across quizzes, so the semantic cache is scoped like the exact one
+        semantic_key = (model, str(question['id']), context_hash)
+        with self._cache_lock:
+            cached = self._help_cache.get(cache_key)
+            if cached is not None:
+                self._help_cache.move_to_end(cache_key)
+        if cached is not None:
+            return messages, cache_key, semantic_key, None, cached
+        
+        # Nothing more can be answered from the caches without the network
+        if self._in_error_backoff():
+            return messages, cache_key, semantic_key, None, None
+        
+        if OPTION_NUMBER_PATTERN.search(help_request_norm):
+            return messages, cache_key, semantic_key, None, None
+        
+        # Differently phrased requests with the same meaning share a response
+        request_vector = self._embed_help_request(help_request_norm)
+        if request_vector is not None:
+            similar = self._semantic_lookup(semantic_key, request_vector)
+            if similar is not None:
+                self._cache_help_response(cache_key, similar)
+                return messages, cache_key, semantic_key, request_vector, similar
+        
+        return messages, cache_key, semantic_key, request_vector, None
+    
+    def _remember_help(self, cache_key: str, semantic_key: Tuple[str, str, str], request_vector: Optional[np.ndarray], help_response: str):
+        """Add a fresh help response to the exact-match and semantic caches"""
+        self._cache_help_response(cache_key, help_response)
+        if request_vector is None:
+            return
+        
+        with self._cache_lock:
+            entry = self.embed_cache.get(semantic_key)
+            if entry is None:
+                matrix, responses = request_vector[np.newaxis, :], (help_response,)
+            else:
+                # Keep the most recent entries; a new matrix is built so lookups
+                # already holding the previous one are unaffected
+                keep = SEMANTIC_CACHE_ENTRIES - 1
+                matrix = np.vstack([entry[0][-keep:], request_vector])
+                responses = entry[1][-keep:] + (help_response,)
+            
+            self.embed_cache[semantic_key] = (matrix, responses)
+            self.embed_cache.move_to_end(semantic_key)
+            if len(self.embed_cache) > SEMANTIC_CACHE_KEYS:
+                self.embed_cache.popitem(last=False)
+    
+    def get_help(self, question: Dict[str, Any], help_request: str) -> str:
+        """Get AI-powered help for a specific question"""
+        model = self._help_model(help_request)
+        messages, cache_key, semantic_key, request_vector, cached = self._prepare_help(question, help_request, model)
+        if cached is not None:
+            return cached
         
-        Keep your response concise and educational. Do not directly state which option(s) are correct.
-        """
+        if self._in_error_backoff():
+            raise Exception("AI help is temporarily unavailable. Please try again shortly.")
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful procurement training assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+            response = self._create_completion(
+                model=model,
+                messages=messages,
                 max_tokens=300,
                 temperature=0.7
             )
             
             content = response.choices[0].message.content
-            return content.strip() if content else "Unable to provide help at this time."
+            if not content:
+                return "Unable to provide help at this time."
+            
+            help_response = content.strip()
+            self._record_success()
+            self._remember_help(cache_key, semantic_key, request_vector, help_response)
+            return help_response
+            
+        except Exception as e:
+            self._record_error(e)
+            raise Exception(f"Failed to get AI help: {e}")
+    
+    def stream_help(self, question: Dict[str, Any], help_request: str) -> Iterator[str]:
+        """Stream AI-powered help for a specific question as it is generated"""
+        model = self._help_model(help_request)
+        messages, cache_key, semantic_key, request_vector, cached = self._prepare_help(question, help_request, model)
+        if cached is not None:
+            yield cached
+            return
+        
+        if self._in_error_backoff():
+            raise Exception("AI help is temporarily unavailable. Please try again shortly.")
+        
+        try:
+            stream = self._create_completion(
+                model=model,
+                messages=messages,
+                max_tokens=300,
+                temperature=0.7,
+                stream=True
+            )
+            
+            chunks = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    chunks.append(delta)
+                    yield delta
             
         except Exception as e:
+            self._record_error(e)
             raise Exception(f"Failed to get AI help: {e}")
+        
+        self._record_success()
+        
+        help_response = "".join(chunks).strip()
+        if not help_response:
+            yield "Unable to provide help at this time."
+            return
+        
+        # Cache the complete response so repeats are served without streaming
+        self._remember_help(cache_key, semantic_key, request_vector, help_response)
     
     def get_answer_feedback(self, question: Dict[str, Any], user_answer: Any) -> str:
         """Generate feedback on the user's answer"""
@@ -83,13 +455,15 @@ class AIHelper:
         Options:
         """
         
+        option_lines = []
         for i, option in enumerate(question['options']):
             selected = ""
             if question['type'] == 'single' and user_answer == i:
                 selected = " [SELECTED]"
             elif question['type'] == 'multi' and i in user_answer:
                 selected = " [SELECTED]"
-            context += f"{i + 1}. {option}{selected}\n"
+            option_lines.append(f"{i + 1}. {option}{selected}\n")
+        context += "".join(option_lines)
         
         # Add correct answer info for AI
         if question['type'] == 'single':
@@ -104,6 +478,9 @@ class AIHelper:
             context += f"\nExplanation: {question['explanation']}\n"
         
         status = "correct" if is_correct else "incorrect"
+        fallback_feedback = f"Answer {status}. Unable to provide detailed feedback at this time."
+        if self._in_error_backoff():
+            return fallback_feedback
         
         prompt = f"""
         You are a procurement training assistant providing feedback on a student's answer.
@@ -124,7 +501,7 @@ class AIHelper:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful procurement training assistant providing answer feedback."},
@@ -134,73 +511,141 @@ class AIHelper:
                 temperature=0.7
             )
             
+            self._record_success()
             content = response.choices[0].message.content
             return content.strip() if content else "Unable to provide feedback at this time."
             
         except Exception as e:
-            return f"Answer {'correct' if is_correct else 'incorrect'}. Unable to provide detailed feedback at this time."
+            self._record_error(e)
+            return fallback_feedback
     
-    def get_improvement_suggestions(self, scores: Dict[str, float], skills_catalog: List[Dict[str, Any]], improvement_rubric: Dict[str, List[str]]) -> Dict[str, str]:
-        """Generate personalized improvement suggestions based on performance"""
+    def _build_performance_data(self, scores: Dict[str, float], skills_catalog: List[Dict[str, Any]], improvement_rubric: Dict[str, List[str]], max_possible_scores: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+        """Calculate the performance level and rubric items for each competency"""
+        keys = [skill['key'] for skill in skills_catalog]
+        scores_arr = np.fromiter((scores.get(k, 0) for k in keys), dtype=np.float64, count=len(keys))
+        max_arr = np.fromiter((max_possible_scores.get(k, 0) for k in keys), dtype=np.float64, count=len(keys))
+        # Competencies with nothing to score stay at 0%
+        levels = np.divide(scores_arr * 100.0, max_arr, out=np.zeros_like(scores_arr), where=max_arr > 0)
         
-        # Calculate performance levels
-        max_possible_per_skill = max(scores.values()) if scores.values() else 1
         performance_data = {}
-        
-        for skill in skills_catalog:
-            skill_key = skill['key']
-            skill_label = skill['label']
-            score = scores.get(skill_key, 0)
-            performance_level = (score / max_possible_per_skill * 100) if max_possible_per_skill > 0 else 0
-            
-            performance_data[skill_key] = {
-                'label': skill_label,
+        for skill, score, performance_level in zip(skills_catalog, scores_arr.tolist(), levels.tolist()):
+            performance_data[skill['key']] = {
+                'label': skill['label'],
                 'score': score,
                 'performance_level': performance_level,
-                'rubric_items': improvement_rubric.get(skill_key, [])
+                'rubric_items': improvement_rubric.get(skill['key'], [])
             }
         
-        prompt = f"""
-        You are a procurement training expert. Analyze this student's quiz performance and provide personalized improvement suggestions.
-        
-        Performance Data:
-        {json.dumps(performance_data, indent=2)}
+        return performance_data
+    
+    def _focus_skills(self, performance_data: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Select the competencies where improvement would have the most impact"""
+        weak_keys = [k for k, data in performance_data.items() if data['performance_level'] < STRONG_SKILL_LEVEL]
+        focus_keys = sorted(weak_keys, key=lambda k: performance_data[k]['performance_level'])[:FOCUS_SKILL_COUNT]
+        
+        # Quantize levels so the prompt, and therefore the cache key, is the same
+        # for students whose results only differ slightly
+        return {
+            skill_key: {
+                **performance_data[skill_key],
+                'performance_level': round(performance_data[skill_key]['performance_level'] / SUGGESTION_LEVEL_STEP) * SUGGESTION_LEVEL_STEP
+            }
+            for skill_key in focus_keys
+        }
+    
+    def _improvement_request(self, focus_data: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Build one chat completion request body covering every focus competency"""
+        skill_keys = list(focus_data.keys())
+        
+        # One compact line per competency keeps the input tokens down
+        lines = [
+            f"{skill_key} ({data['label']}): {data['performance_level']:.0f}% — rubric: {'; '.join(data['rubric_items'][:PROMPT_RUBRIC_ITEMS])}"
+            for skill_key, data in focus_data.items()
+        ]
+        performance_table = "\n".join(lines)
+        
+        # Only the performance data varies; the static prefix comes first
+        prompt = IMPROVEMENT_USER_TEMPLATE.format(
+            performance_table=performance_table,
+            skill_keys=', '.join(skill_keys)
+        )
+        
+        # The schema forces every competency into a single packed response
+        suggestions_schema = {
+            "type": "object",
+            "properties": {skill_key: {"type": "string"} for skill_key in skill_keys},
+            "required": skill_keys,
+            "additionalProperties": False
+        }
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": IMPROVEMENT_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "improvement_suggestions",
+                    "strict": True,
+                    "schema": suggestions_schema
+                }
+            },
+            "max_tokens": 800,
+            "temperature": 0.7
+        }
+    
+    def _fallback_suggestions(self, performance_data: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        """Build rubric-based suggestions for when the AI is unavailable"""
+        fallback_suggestions = {}
+        for skill_key, data in performance_data.items():
+            if data['performance_level'] < 70:  # Focus on lower performing areas
+                fallback_suggestions[skill_key] = f"Focus on: {', '.join(data['rubric_items'][:2])}"
+        
+        return fallback_suggestions if fallback_suggestions else {"general": GENERAL_SUGGESTION}
+    
+    def get_improvement_suggestions(self, scores: Dict[str, float], skills_catalog: List[Dict[str, Any]], improvement_rubric: Dict[str, List[str]], max_possible_scores: Dict[str, float]) -> Dict[str, str]:
+        """Generate personalized improvement suggestions based on performance"""
         
-        For each competency, provide specific, actionable improvement suggestions based on:
-        1. The student's performance level in that area
-        2. The improvement rubric items provided
-        3. Your expertise in procurement best practices
+        performance_data = self._build_performance_data(scores, skills_catalog, improvement_rubric, max_possible_scores)
+        focus_data = self._focus_skills(performance_data)
+        if not focus_data:
+            return {"general": GENERAL_SUGGESTION}
         
-        Focus on the 2-3 areas where improvement would have the most impact. Make suggestions practical and specific.
+        # The request body fully determines the suggestions, so identical bodies
+        # from different students are answered once
+        request = self._improvement_request(focus_data)
+        cache_key = hashlib.sha256(orjson.dumps(request, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        with self._cache_lock:
+            cached = self._suggestion_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
         
-        Respond in JSON format with skill keys as top-level keys and improvement text as values:
-        {{"skill_key": "specific improvement suggestion text", ...}}
-        """
+        if self._in_error_backoff():
+            return self._fallback_suggestions(performance_data)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a procurement training expert providing personalized feedback."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=800,
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            if content:
-                suggestions = json.loads(content)
-            else:
-                suggestions = {}
-            return suggestions
-            
+            response = self._create_completion(**request)
         except Exception as e:
+            self._record_error(e)
             # Fallback to rubric-based suggestions if AI fails
-            fallback_suggestions = {}
-            for skill_key, data in performance_data.items():
-                if data['performance_level'] < 70:  # Focus on lower performing areas
-                    fallback_suggestions[skill_key] = f"Focus on: {', '.join(data['rubric_items'][:2])}"
-            
-            return fallback_suggestions if fallback_suggestions else {"general": "Continue practicing procurement case studies to improve overall performance."}
+            return self._fallback_suggestions(performance_data)
+        
+        self._record_success()
+        content = response.choices[0].message.content
+        if not content:
+            return {}
+        
+        try:
+            suggestions = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return self._fallback_suggestions(performance_data)
+        
+        with self._cache_lock:
+            now = time.monotonic()
+            # Drop expired entries so the cache doesn't grow without bound
+            for key in [key for key, (expires_at, _) in self._suggestion_cache.items() if expires_at <= now]:
+                del self._suggestion_cache[key]
+            self._suggestion_cache[cache_key] = (now + SUGGESTION_CACHE_TTL, suggestions)
+        return suggestions
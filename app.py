@@ -1,11 +1,18 @@
 import streamlit as st
-import json
 import os
 import random
+import logging
 from pathlib import Path
-from quiz_engine import QuizEngine
-from ai_helper import AIHelper
-from visualization import create_radar_chart
+from quiz_engine import QuizEngine, validate_quiz
+import quiz_index
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    # Fall back to the stdlib parser, which also accepts bytes
+    from json import loads as json_loads
+
+logger = logging.getLogger(__name__)
 
 # Configure page
 st.set_page_config(
@@ -14,28 +21,103 @@ st.set_page_config(
     layout="wide"
 )
 
-def load_available_quizzes():
-    """Load all available quiz files from content directory"""
-    content_dir = Path("content")
+@st.cache_data(show_spinner=False)
+def _load_quiz_file(path: str, mtime: float, size: int):
+    """Parse and validate a quiz file; mtime and size are part of the cache key so edits are picked up"""
+    quiz_data = json_loads(Path(path).read_bytes())
+    validate_quiz(quiz_data)
+    return quiz_data
+
+@st.cache_resource(show_spinner=False)
+def _prepare_quiz_index():
+    """Rebuild a stale quiz index once at startup; later edits are served by the per-file loader"""
+    try:
+        quiz_files = quiz_index.find_quiz_files()
+        if not quiz_index.is_index_current(quiz_files):
+            quiz_index.rebuild_index(quiz_files)
+    except Exception as e:
+        # Read-only content directory or a broken quiz file; the failure is
+        # cached with the result, so it isn't retried on every rerun
+        logger.warning("Could not rebuild the quiz index, loading quiz files individually: %s", e)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_quiz_index(index_path: str, mtime: float):
+    """Unpack and validate the quiz index once per index version, or None if it can't be used"""
+    try:
+        quizzes = quiz_index.read_index(Path(index_path))
+        for quiz in quizzes.values():
+            validate_quiz(quiz['data'])
+    except Exception as e:
+        logger.warning("Could not read the quiz index, loading quiz files individually: %s", e)
+        return None
+    return quizzes, build_title_index(quizzes)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _index_quiz_files(file_versions):
+    """Collect the quizzes and their title index once per set of quiz file versions"""
     quizzes = {}
+    for path, mtime, size in file_versions:
+        quiz_data = _load_quiz_file(path, mtime, size)
+        quizzes[quiz_data['slug']] = {
+            'title': quiz_data['title'],
+            'file_path': path,
+            'data': quiz_data
+        }
+    return quizzes, build_title_index(quizzes)
+
+def build_title_index(quizzes):
+    """Map each quiz title to its slug for the selection dropdown"""
+    return {quiz['title']: slug for slug, quiz in quizzes.items()}
+
+def load_available_quizzes():
+    """Load all available quiz files from content directory.
+    
+    Returns the quizzes keyed by slug and a title-to-slug mapping.
+    """
+    _prepare_quiz_index()
+    quiz_files = quiz_index.find_quiz_files()
+    
+    # Prefer the packed index while it is newer than every quiz file
+    if quiz_index.is_index_current(quiz_files):
+        index_path = quiz_index.INDEX_PATH
+        loaded = _load_quiz_index(str(index_path), index_path.stat().st_mtime)
+        if loaded is not None:
+            return loaded
+    
+    # Otherwise load file by file, so edited files are picked up and broken ones reported
+    file_versions = []
+    for quiz_file in quiz_files:
+        try:
+            stat = quiz_file.stat()
+            _load_quiz_file(str(quiz_file), stat.st_mtime, stat.st_size)
+            file_versions.append((str(quiz_file), stat.st_mtime, stat.st_size))
+        except Exception as e:
+            st.error(f"Error loading quiz from {quiz_file}: {e}")
     
-    if content_dir.exists():
-        for quiz_dir in content_dir.iterdir():
-            if quiz_dir.is_dir():
-                quiz_file = quiz_dir / "quiz.json"
-                if quiz_file.exists():
-                    try:
-                        with open(quiz_file, 'r') as f:
-                            quiz_data = json.load(f)
-                        quizzes[quiz_data['slug']] = {
-                            'title': quiz_data['title'],
-                            'file_path': str(quiz_file),
-                            'data': quiz_data
-                        }
-                    except Exception as e:
-                        st.error(f"Error loading quiz from {quiz_file}: {e}")
-    
-    return quizzes
+    return _index_quiz_files(tuple(file_versions))
+
+@st.cache_resource(show_spinner=False, max_entries=512)
+def build_engine(slug: str, file_path: str, mtime: float, size: int, shuffle_seed: int, _quiz_data) -> QuizEngine:
+    """Build the QuizEngine for a quiz attempt once and reuse it across reruns"""
+    # The leading underscore keeps the already-validated quiz data out of the cache key;
+    # the file's mtime and size stand in for it, so an edited quiz gets a new engine.
+    # An evicted engine is rebuilt with the same seed, so the option order doesn't change.
+    return QuizEngine(_quiz_data, shuffle_seed)
+
+def get_quiz_engine(available_quizzes):
+    """Return the engine for the selected quiz, or None if no quiz is selected"""
+    slug = st.session_state.selected_quiz
+    quiz = available_quizzes.get(slug) if slug else None
+    if quiz is None:
+        return None
+    stat = Path(quiz['file_path']).stat()
+    return build_engine(slug, quiz['file_path'], stat.st_mtime, stat.st_size, st.session_state.shuffle_seed, quiz['data'])
+
+@st.cache_resource(show_spinner=False)
+def get_ai_helper():
+    """Create the AIHelper shared by all sessions"""
+    from ai_helper import AIHelper
+    return AIHelper()
 
 def shuffle_question_options(question):
     """Shuffle answer options and update indices accordingly"""
@@ -78,14 +160,11 @@ def shuffle_question_options(question):
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if 'quiz_engine' not in st.session_state:
-        st.session_state.quiz_engine = None
-    if 'ai_helper' not in st.session_state:
+    if 'ai_helper_error' not in st.session_state:
         try:
-            st.session_state.ai_helper = AIHelper()
+            get_ai_helper()
             st.session_state.ai_helper_error = None
         except Exception as e:
-            st.session_state.ai_helper = None
             st.session_state.ai_helper_error = str(e)
     if 'current_question' not in st.session_state:
         st.session_state.current_question = 0
@@ -103,6 +182,8 @@ def initialize_session_state():
         st.session_state.showing_feedback = False
     if 'feedback_for_question' not in st.session_state:
         st.session_state.feedback_for_question = None
+    if 'shuffle_seed' not in st.session_state:
+        st.session_state.shuffle_seed = random.getrandbits(64)
 
 def reset_quiz_state():
     """Reset quiz-related session state"""
@@ -110,11 +191,11 @@ def reset_quiz_state():
     st.session_state.user_answers = {}
     st.session_state.quiz_completed = False
     st.session_state.quiz_started = False
-    st.session_state.quiz_engine = None
+    st.session_state.selected_quiz = None
     st.session_state.showing_feedback = False
     st.session_state.feedback_for_question = None
 
-def display_quiz_selection(available_quizzes):
+def display_quiz_selection(title_to_slug):
     """Display quiz selection interface"""
     st.title("ProcureIQ")
     
@@ -140,25 +221,23 @@ def display_quiz_selection(available_quizzes):
     
     st.write("Select a case study simulation to begin your procurement training.")
     
-    if not available_quizzes:
+    if not title_to_slug:
         st.error("No quiz files found. Please ensure quiz data is available in the content directory.")
         return
     
-    quiz_options = {quiz['title']: slug for slug, quiz in available_quizzes.items()}
-    
     selected_title = st.selectbox(
         "Choose a case study:",
-        options=list(quiz_options.keys()),
+        options=list(title_to_slug.keys()),
         key="quiz_selector"
     )
     
     if selected_title:
-        selected_slug = quiz_options[selected_title]
-        quiz_data = available_quizzes[selected_slug]['data']
+        selected_slug = title_to_slug[selected_title]
         
         if st.button("Start Simulation", type="primary"):
             st.session_state.selected_quiz = selected_slug
-            st.session_state.quiz_engine = QuizEngine(quiz_data)
+            # Each attempt gets its own option order
+            st.session_state.shuffle_seed = random.getrandbits(64)
             # Reset only the quiz progress, not the started state
             st.session_state.current_question = 0
             st.session_state.user_answers = {}
@@ -166,9 +245,8 @@ def display_quiz_selection(available_quizzes):
             st.session_state.quiz_started = True
             st.rerun()
 
-def display_question():
+def display_question(quiz_engine):
     """Display current question with options"""
-    quiz_engine = st.session_state.quiz_engine
     current_q_idx = st.session_state.current_question
     
     # Safety check - if quiz engine is not ready, return to selection
@@ -214,43 +292,75 @@ def display_question():
     # Question stem
     st.subheader(question['stem'])
     
-    # Display options based on question type
-    if question['type'] == 'single':
-        # Single select with default "choose one" option
-        options_with_default = [-1] + list(range(len(question['options'])))
+    # Answer widgets live in a form so selecting options doesn't rerun the
+    # script; the answer is only read when a navigation button is pressed
+    is_last_question = current_q_idx >= len(quiz_engine.selected_questions) - 1
+    with st.form(key=f"q_form_{question['id']}"):
+        # Display options based on question type
+        if question['type'] == 'single':
+            # Single select with default "choose one" option
+            options_with_default = [-1] + list(range(len(question['options'])))
+            
+            def format_option(x):
+                if x == -1:
+                    return "— Choose one of the following —"
+                return question['options'][x]
+            
+            answer = st.radio(
+                "Select one option:",
+                options=options_with_default,
+                format_func=format_option,
+                key=f"q_{question['id']}"
+            )
+            
+        elif question['type'] == 'multi':
+            # Multi select as a single widget rather than one checkbox per option
+            answer = st.multiselect(
+                f"Select exactly {question['select_count']} options:",
+                options=list(range(len(question['options']))),
+                format_func=lambda i: question['options'][i],
+                max_selections=question['select_count'],
+                key=f"q_{question['id']}"
+            )
         
-        def format_option(x):
-            if x == -1:
-                return "— Choose one of the following —"
-            return question['options'][x]
+        # Navigation buttons - always visible for consistency
+        col1, col2, col3 = st.columns([1, 1, 1])
         
-        answer = st.radio(
-            "Select one option:",
-            options=options_with_default,
-            format_func=format_option,
-            key=f"q_{question['id']}"
-        )
+        with col1:
+            previous_clicked = st.form_submit_button("Previous", disabled=current_q_idx == 0)
         
-        # Only save valid answers (not the default)
-        if answer != -1:
+        with col2:
+            next_clicked = st.form_submit_button("Next", disabled=is_last_question)
+        
+        with col3:
+            finish_clicked = st.form_submit_button("Finish Quiz")
+    
+    if previous_clicked or next_clicked or finish_clicked:
+        # Check if current question has a valid answer
+        if question['type'] == 'multi':
+            has_valid_answer = len(answer) == question['select_count']
+        else:
+            has_valid_answer = answer != -1
+        
+        # Only save valid answers
+        if has_valid_answer:
             st.session_state.user_answers[question['id']] = answer
         elif question['id'] in st.session_state.user_answers:
-            # Remove any previous answer if back to default
+            # Remove any previous answer if no longer valid
             del st.session_state.user_answers[question['id']]
         
-    elif question['type'] == 'multi':
-        # Multi select
-        st.write(f"Select exactly {question['select_count']} options:")
-        answers = []
-        for i, option in enumerate(question['options']):
-            if st.checkbox(option, key=f"q_{question['id']}_option_{i}"):
-                answers.append(i)
-        
-        # Validate selection count
-        if len(answers) != question['select_count'] and len(answers) > 0:
-            st.warning(f"Please select exactly {question['select_count']} options. You have selected {len(answers)}.")
-        
-        st.session_state.user_answers[question['id']] = answers
+        if previous_clicked:
+            st.session_state.current_question -= 1
+            st.rerun()
+        elif has_valid_answer:
+            # Show feedback before moving to the next question or finishing the quiz
+            st.session_state.showing_feedback = True
+            st.session_state.feedback_for_question = current_q_idx
+            st.rerun()
+        elif question['type'] == 'multi':
+            st.warning(f"💡 Please select exactly {question['select_count']} options to proceed. You have selected {len(answer)}.")
+        else:
+            st.warning("💡 Please select an answer to proceed.")
     
     # AI Helper section - don't show immediately after feedback transition
     if not st.session_state.get('showing_feedback', False):
@@ -261,10 +371,6 @@ def display_question():
             st.error(f"AI Help not available: {st.session_state.ai_helper_error}")
             return
         
-        if not st.session_state.ai_helper:
-            st.error("AI Helper not initialized. Please refresh the page.")
-            return
-        
         # Use a form so Enter key submits the help request
         with st.form(key=f"help_form_{question['id']}"):
             help_request = st.text_input(
@@ -277,57 +383,15 @@ def display_question():
                 if not help_request.strip():
                     st.error("Please enter a question or request for help.")
                 else:
-                    with st.spinner("Getting AI assistance..."):
-                        try:
-                            help_response = st.session_state.ai_helper.get_help(question, help_request)
-                            st.success("AI Response:")
-                            st.info(help_response)
-                        except Exception as e:
-                            st.error(f"Error getting AI help: {str(e)}")
-                            st.write("Please try again or contact support if the issue persists.")
-    
-    # Navigation buttons - always visible for consistency
-    col1, col2, col3 = st.columns([1, 1, 1])
-    
-    # Check if current question has a valid answer
-    has_valid_answer = False
-    if question['id'] in st.session_state.user_answers:
-        answer = st.session_state.user_answers[question['id']]
-        if question['type'] == 'multi':
-            has_valid_answer = len(answer) == question['select_count']
-        else:
-            has_valid_answer = True
-    
-    with col1:
-        if st.button("Previous", disabled=current_q_idx == 0):
-            st.session_state.current_question -= 1
-            st.rerun()
-    
-    with col2:
-        is_last_question = current_q_idx >= len(quiz_engine.selected_questions) - 1
-        if st.button("Next", disabled=is_last_question or not has_valid_answer):
-            # Show feedback before moving to next question
-            st.session_state.showing_feedback = True
-            st.session_state.feedback_for_question = current_q_idx
-            st.rerun()
-    
-    with col3:
-        if st.button("Finish Quiz", disabled=not has_valid_answer):
-            # Show feedback before finishing quiz
-            st.session_state.showing_feedback = True
-            st.session_state.feedback_for_question = current_q_idx
-            st.rerun()
-    
-    # Show helpful message if answer not selected
-    if not has_valid_answer:
-        if question['type'] == 'multi':
-            st.info(f"💡 Please select exactly {question['select_count']} options to proceed.")
-        else:
-            st.info("💡 Please select an answer to proceed.")
+                    try:
+                        st.success("AI Response:")
+                        st.write_stream(get_ai_helper().stream_help(question, help_request))
+                    except Exception as e:
+                        st.error(f"Error getting AI help: {str(e)}")
+                        st.write("Please try again or contact support if the issue persists.")
 
-def display_feedback():
+def display_feedback(quiz_engine):
     """Display feedback for the current question"""
-    quiz_engine = st.session_state.quiz_engine
     current_q_idx = st.session_state.feedback_for_question
     
     if current_q_idx is None or current_q_idx >= len(quiz_engine.selected_questions):
@@ -365,11 +429,11 @@ def display_feedback():
         st.error("❌ Incorrect")
     
     # Generate and display AI feedback
-    if st.session_state.ai_helper and not st.session_state.ai_helper_error:
+    if not st.session_state.ai_helper_error:
         st.subheader("Feedback")
         with st.spinner("Generating personalized feedback..."):
             try:
-                feedback = st.session_state.ai_helper.get_answer_feedback(question, user_answer)
+                feedback = get_ai_helper().get_answer_feedback(question, user_answer)
                 st.info(feedback)
             except Exception as e:
                 st.error(f"Unable to generate feedback: {str(e)}")
@@ -406,17 +470,18 @@ def display_feedback():
             
             st.rerun()
 
-def display_results():
+def display_results(quiz_engine):
     """Display quiz results with radar chart and improvement suggestions"""
-    quiz_engine = st.session_state.quiz_engine
+    # Plotly is only needed here, so it is not imported on the other pages
+    from visualization import create_radar_chart
     
-    # Calculate scores
-    scores = quiz_engine.calculate_scores(st.session_state.user_answers)
+    # Calculate scores and missed questions in one pass
+    scores, missed_questions = quiz_engine.evaluate(st.session_state.user_answers)
     
     st.title("Quiz Results")
     
     # Overall score
-    total_score = sum(scores.values())
+    total_score = round(sum(scores.values()), 6)
     max_possible = len(quiz_engine.selected_questions)
     percentage = (total_score / max_possible) * 100 if max_possible > 0 else 0
     
@@ -424,7 +489,7 @@ def display_results():
     
     # Radar chart
     st.subheader("Competency Assessment")
-    fig = create_radar_chart(scores, quiz_engine.quiz_data['skills_catalog'], quiz_engine.selected_questions)
+    fig = create_radar_chart(scores, quiz_engine.quiz_data['skills_catalog'], quiz_engine.max_possible_scores)
     st.plotly_chart(fig, use_container_width=True)
     
     # AI-generated improvement suggestions (only for scores 90% or below)
@@ -432,18 +497,18 @@ def display_results():
         st.subheader("Improvement Suggestions")
         with st.spinner("Generating personalized improvement suggestions..."):
             try:
-                suggestions = st.session_state.ai_helper.get_improvement_suggestions(
+                # Repeat renders are answered from the helper's suggestion cache,
+                # which only keeps successful responses
+                suggestions = get_ai_helper().get_improvement_suggestions(
                     scores, 
                     quiz_engine.quiz_data['skills_catalog'],
-                    quiz_engine.quiz_data['improvement_rubric']
+                    quiz_engine.quiz_data['improvement_rubric'],
+                    quiz_engine.max_possible_scores
                 )
                 
+                label_by_key = {skill['key']: skill['label'] for skill in quiz_engine.quiz_data['skills_catalog']}
                 for skill_key, suggestion in suggestions.items():
-                    skill_label = next(
-                        (skill['label'] for skill in quiz_engine.quiz_data['skills_catalog'] 
-                         if skill['key'] == skill_key), 
-                        skill_key
-                    )
+                    skill_label = label_by_key.get(skill_key, skill_key)
                     st.write(f"**{skill_label}:**")
                     st.write(suggestion)
                     st.write("")
@@ -455,7 +520,6 @@ def display_results():
     
     # Quiz completion analysis
     st.subheader("Review")
-    missed_questions = quiz_engine.get_missed_questions(st.session_state.user_answers)
     total_questions = len(quiz_engine.selected_questions)
     answered_questions = len(st.session_state.user_answers)
     
@@ -492,14 +556,16 @@ def main():
         user_name = st.text_input("User Name:", value=st.session_state.user_name, key="user_name_input")
         st.session_state.user_name = user_name
         
-        available_quizzes = load_available_quizzes()
+        # Loaded once per rerun, so a broken quiz file is reported only once
+        available_quizzes, title_to_slug = load_available_quizzes()
+        quiz_engine = get_quiz_engine(available_quizzes)
         
         if st.session_state.quiz_started and st.session_state.selected_quiz:
             quiz_title = available_quizzes[st.session_state.selected_quiz]['title']
             st.write(f"**Current Quiz:** {quiz_title}")
             
-            if not st.session_state.quiz_completed and st.session_state.quiz_engine:
-                st.write(f"**Progress:** {st.session_state.current_question + 1}/{len(st.session_state.quiz_engine.selected_questions)}")
+            if not st.session_state.quiz_completed and quiz_engine:
+                st.write(f"**Progress:** {st.session_state.current_question + 1}/{len(quiz_engine.selected_questions)}")
             
             if st.button("Return to Simulation Selection"):
                 reset_quiz_state()
@@ -523,13 +589,13 @@ def main():
     
     # Main content
     if not st.session_state.quiz_started:
-        display_quiz_selection(available_quizzes)
+        display_quiz_selection(title_to_slug)
     elif st.session_state.quiz_completed:
-        display_results()
+        display_results(quiz_engine)
     elif st.session_state.showing_feedback:
-        display_feedback()
+        display_feedback(quiz_engine)
     else:
-        display_question()
+        display_question(quiz_engine)
 
 if __name__ == "__main__":
     main()
@@ -1,28 +1,45 @@
+import copy
 import json
 import random
-from typing import Dict, List, Any
-from jsonschema import validate, ValidationError
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+
+def validate_quiz(quiz_data: Dict[str, Any]):
+    """Validate quiz data structure once, marking the dict so later checks are skipped"""
+    if quiz_data.get('_validated'):
+        return
+    
+    required_fields = ['questions', 'skills_catalog', 'scoring']
+    for field in required_fields:
+        if field not in quiz_data:
+            raise ValueError(f"Missing required field: {field}")
+    
+    if len(quiz_data['questions']) < 8:
+        raise ValueError("Quiz must have at least 8 questions")
+    
+    quiz_data['_validated'] = True
 
 class QuizEngine:
-    def __init__(self, quiz_data: Dict[str, Any]):
+    def __init__(self, quiz_data: Dict[str, Any], shuffle_seed: Optional[int] = None):
         self.quiz_data = quiz_data
         self.validate_quiz_data()
+        # Seeds the option shuffle; a fresh seed per quiz attempt gives each attempt its own order
+        self.shuffle_seed = shuffle_seed if shuffle_seed is not None else random.getrandbits(64)
         self.selected_questions = self.select_questions()
+        self._build_skill_weights()
+        # Maximum achievable score per competency, i.e. the column sums of the weights,
+        # rounded like the scores so a perfect result is exactly 100%
+        self.max_possible_scores = {
+            skill_key: round(total, 6)
+            for skill_key, total in zip(self._skill_keys, self._weights.sum(axis=0).tolist())
+        }
     
     def validate_quiz_data(self):
-        """Validate quiz data structure"""
-        required_fields = ['questions', 'skills_catalog', 'scoring']
-        for field in required_fields:
-            if field not in self.quiz_data:
-                raise ValueError(f"Missing required field: {field}")
-        
-        if len(self.quiz_data['questions']) < 8:
-            raise ValueError("Quiz must have at least 8 questions")
+        """Validate quiz data structure; a no-op if the loader already validated it"""
+        validate_quiz(self.quiz_data)
     
     def select_questions(self) -> List[Dict[str, Any]]:
         """Select 10 questions from available pool and shuffle their options"""
-        import random
-        
         all_questions = self.quiz_data['questions'].copy()
         deliver_count = self.quiz_data['scoring'].get('deliver_count', 10)
         
@@ -33,74 +50,78 @@ class QuizEngine:
             # This maintains the "fixed order" requirement mentioned in the spec
             selected_questions = all_questions[:deliver_count]
         
-        # Shuffle answer options for each question to prevent patterns
-        for question in selected_questions:
-            self._shuffle_question_options(question)
-            
-        return selected_questions
+        # Shuffle answer options for each question to prevent patterns; the
+        # shuffled copies leave the source quiz data untouched
+        return [self._shuffle_question_options(question) for question in selected_questions]
     
-    def _shuffle_question_options(self, question):
-        """Shuffle answer options and update indices accordingly"""
-        import random
+    def _shuffle_question_options(self, question: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a copy of the question with shuffled answer options and updated indices"""
+        # Shallow copy: options and indices are replaced below, never mutated
+        question = copy.copy(question)
+        
+        # Question ids repeat across quizzes, so the quiz slug and the
+        # per-attempt seed keep the order from being shared between them
+        rng = random.Random(f"{self.shuffle_seed}:{self.quiz_data.get('slug', '')}:{question['id']}")
+        
+        # Shuffle an index permutation; perm[new_position] is the original index
+        perm = list(range(len(question['options'])))
+        rng.shuffle(perm)
+        question['options'] = [question['options'][i] for i in perm]
+        
+        # Inverse permutation: new_position[original_index] is where that option moved
+        new_position = [0] * len(perm)
+        for position, original_index in enumerate(perm):
+            new_position[original_index] = position
         
         if question['type'] == 'single':
-            # Create list of (option, is_correct) pairs
-            options_with_correctness = [(option, i == question['answer_index']) 
-                                       for i, option in enumerate(question['options'])]
-            
-            # Shuffle the pairs
-            random.shuffle(options_with_correctness)
-            
-            # Extract shuffled options and find new correct index
-            shuffled_options = [option for option, _ in options_with_correctness]
-            new_answer_index = next(i for i, (_, is_correct) in enumerate(options_with_correctness) if is_correct)
-            
-            # Update question
-            question['options'] = shuffled_options
-            question['answer_index'] = new_answer_index
+            question['answer_index'] = new_position[question['answer_index']]
             
         elif question['type'] == 'multi':
-            # Create list of (option, is_correct) pairs
-            correct_indices = set(question['answer_indices'])
-            options_with_correctness = [(option, i in correct_indices) 
-                                       for i, option in enumerate(question['options'])]
-            
-            # Shuffle the pairs
-            random.shuffle(options_with_correctness)
-            
-            # Extract shuffled options and find new correct indices
-            shuffled_options = [option for option, _ in options_with_correctness]
-            new_answer_indices = [i for i, (_, is_correct) in enumerate(options_with_correctness) if is_correct]
-            
-            # Update question
-            question['options'] = shuffled_options
+            new_answer_indices = sorted(new_position[i] for i in question['answer_indices'])
             question['answer_indices'] = new_answer_indices
+            # Precomputed once so answer checks don't rebuild the set every time
+            question['_answer_set'] = frozenset(new_answer_indices)
+        
+        return question
     
-    def calculate_scores(self, user_answers: Dict[str, Any]) -> Dict[str, float]:
-        """Calculate scores by competency"""
-        competency_scores = {}
+    def _build_skill_weights(self):
+        """Build the (questions x skills) weight matrix used for scoring"""
+        self._skill_keys = [skill['key'] for skill in self.quiz_data['skills_catalog']]
+        self._skill_index = {skill_key: i for i, skill_key in enumerate(self._skill_keys)}
+        self._weights = np.zeros((len(self.selected_questions), len(self._skill_keys)), dtype=np.float64)
         
-        # Initialize scores for all competencies
-        for skill in self.quiz_data['skills_catalog']:
-            competency_scores[skill['key']] = 0.0
+        for row, question in enumerate(self.selected_questions):
+            for skill in question.get('skills', []):
+                col = self._skill_index.get(skill['key'])
+                if col is not None:
+                    self._weights[row, col] += skill.get('weight', 1.0)
+    
+    def evaluate(self, user_answers: Dict[str, Any]) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+        """Calculate scores by competency and collect missed questions in a single pass"""
+        # 1.0 for each correctly answered question, 0.0 for wrong or unanswered
+        correct_mask = np.zeros(len(self.selected_questions), dtype=np.float64)
+        missed = []
         
-        for question in self.selected_questions:
+        for row, question in enumerate(self.selected_questions):
             question_id = question['id']
             if question_id not in user_answers:
                 continue
             
             user_answer = user_answers[question_id]
-            is_correct = self.is_answer_correct(question, user_answer)
-            
-            if is_correct:
-                # Distribute points based on skill weights
-                for skill in question.get('skills', []):
-                    skill_key = skill['key']
-                    weight = skill.get('weight', 1.0)
-                    if skill_key in competency_scores:
-                        competency_scores[skill_key] += weight
+            if self.is_answer_correct(question, user_answer):
+                correct_mask[row] = 1.0
+            else:
+                missed.append(self._format_missed_question(question, user_answer))
         
-        return competency_scores
+        # Distribute points based on skill weights
+        scores_vec = correct_mask @ self._weights
+        # Rounded so float summation order doesn't show up as 1.9999999999999998
+        scores = {skill_key: round(float(score), 6) for skill_key, score in zip(self._skill_keys, scores_vec)}
+        return scores, missed
+    
+    def calculate_scores(self, user_answers: Dict[str, Any]) -> Dict[str, float]:
+        """Calculate scores by competency"""
+        return self.evaluate(user_answers)[0]
     
     def is_answer_correct(self, question: Dict[str, Any], user_answer: Any) -> bool:
         """Check if user answer is correct"""
@@ -115,39 +136,29 @@ class QuizEngine:
                 return False
             
             # Check if all selected answers are correct
-            correct_indices = set(question['answer_indices'])
-            user_indices = set(user_answer)
-            return user_indices == correct_indices
+            return frozenset(user_answer) == question['_answer_set']
         
         return False
     
+    def _format_missed_question(self, question: Dict[str, Any], user_answer: Any) -> Dict[str, Any]:
+        """Format missed question with only the fields shown in the results review"""
+        if question['type'] == 'single':
+            user_answer_text = question['options'][user_answer] if user_answer < len(question['options']) else "Invalid"
+            correct_answer_text = question['options'][question['answer_index']]
+        elif question['type'] == 'multi':
+            user_answer_text = [question['options'][i] for i in user_answer if i < len(question['options'])]
+            correct_answer_text = [question['options'][i] for i in question['answer_indices']]
+        else:
+            user_answer_text = "Unknown"
+            correct_answer_text = "Unknown"
+        
+        return {
+            'stem': question['stem'],
+            'explain': question.get('explain', ''),
+            'user_answer_text': user_answer_text,
+            'correct_answer_text': correct_answer_text
+        }
+    
     def get_missed_questions(self, user_answers: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Get list of questions user answered incorrectly"""
-        missed = []
-        
-        for question in self.selected_questions:
-            question_id = question['id']
-            if question_id not in user_answers:
-                continue
-            
-            user_answer = user_answers[question_id]
-            if not self.is_answer_correct(question, user_answer):
-                # Format missed question with additional info
-                missed_q = question.copy()
-                
-                if question['type'] == 'single':
-                    user_answer_text = question['options'][user_answer] if user_answer < len(question['options']) else "Invalid"
-                    correct_answer_text = question['options'][question['answer_index']]
-                elif question['type'] == 'multi':
-                    user_answer_text = [question['options'][i] for i in user_answer if i < len(question['options'])]
-                    correct_answer_text = [question['options'][i] for i in question['answer_indices']]
-                else:
-                    user_answer_text = "Unknown"
-                    correct_answer_text = "Unknown"
-                
-                missed_q['user_answer_text'] = user_answer_text
-                missed_q['correct_answer_text'] = correct_answer_text
-                
-                missed.append(missed_q)
-        
-        return missed
+        return self.evaluate(user_answers)[1]
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import msgpack
+from pathlib import Path
+from typing import Dict, List, Any
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    # Fall back to the stdlib parser, which also accepts bytes
+    from json import loads as json_loads
+
+CONTENT_DIR = Path("content")
+INDEX_PATH = CONTENT_DIR / "_index.msgpack"
+
+def find_quiz_files(content_dir: Path = CONTENT_DIR) -> List[Path]:
+    """Find all quiz files in the content directory"""
+    return sorted(content_dir.glob("*/quiz.json"))
+
+def is_index_current(quiz_files: List[Path], content_dir: Path = CONTENT_DIR, index_path: Path = INDEX_PATH) -> bool:
+    """Check whether the index is newer than every quiz file and quiz directory"""
+    if not index_path.exists():
+        return False
+    
+    # Directory mtimes change when quizzes are added or removed
+    paths = [content_dir] + [quiz_file.parent for quiz_file in quiz_files] + quiz_files
+    newest = max(path.stat().st_mtime for path in paths)
+    return index_path.stat().st_mtime >= newest
+
+def rebuild_index(quiz_files: List[Path], index_path: Path = INDEX_PATH) -> Dict[str, Dict[str, Any]]:
+    """Parse every quiz file once and write them all to a single packed index"""
+    quizzes = {}
+    for quiz_file in quiz_files:
+        quiz_data = json_loads(quiz_file.read_bytes())
+        quizzes[quiz_data['slug']] = {
+            'title': quiz_data['title'],
+            'file_path': str(quiz_file),
+            'data': quiz_data
+        }
+    
+    # Written to a temporary file and renamed into place, so readers never see a partial index
+    fd, tmp_path = tempfile.mkstemp(dir=index_path.parent, prefix=index_path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(msgpack.packb(quizzes))
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    
+    # The rename bumps the content directory's mtime, so touch the index to
+    # keep it newer than the directory
+    os.utime(index_path)
+    return quizzes
+
+def read_index(index_path: Path = INDEX_PATH) -> Dict[str, Dict[str, Any]]:
+    """Load all quizzes from the packed index"""
+    return msgpack.unpackb(index_path.read_bytes(), raw=False)
+
+if __name__ == "__main__":
+    quizzes = rebuild_index(find_quiz_files())
+    print(f"Indexed {len(quizzes)} quizzes into {INDEX_PATH}")
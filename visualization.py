@@ -1,32 +1,36 @@
-import plotly.graph_objects as go
-import plotly.express as px
-from typing import Dict, List, Any, Optional
+from __future__ import annotations
 
-def create_radar_chart(scores: Dict[str, float], skills_catalog: List[Dict[str, Any]], quiz_questions: Optional[List[Dict[str, Any]]] = None) -> go.Figure:
+import streamlit as st
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    # Plotly is imported inside the chart builders so importing this module stays cheap
+    import plotly.graph_objects as go
+
+def create_radar_chart(scores: Dict[str, float], skills_catalog: List[Dict[str, Any]], max_possible_scores: Optional[Dict[str, float]] = None) -> go.Figure:
     """Create a radar chart showing competency scores"""
+    # Convert the inputs to hashable tuples so the figure can be cached
+    score_items = tuple(sorted(scores.items()))
+    skills = tuple((skill['key'], skill['label']) for skill in skills_catalog)
+    max_items = tuple(sorted(max_possible_scores.items())) if max_possible_scores else None
     
-    # Calculate maximum possible score for each competency
-    max_possible_scores = {}
-    if quiz_questions:
-        for skill in skills_catalog:
-            max_possible_scores[skill['key']] = 0.0
-        
-        for question in quiz_questions:
-            for skill in question.get('skills', []):
-                skill_key = skill['key']
-                weight = skill.get('weight', 1.0)
-                if skill_key in max_possible_scores:
-                    max_possible_scores[skill_key] += weight
+    return _build_radar_chart(score_items, skills, max_items)
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _build_radar_chart(score_items: Tuple[Tuple[str, float], ...], skills: Tuple[Tuple[str, str], ...], max_items: Optional[Tuple[Tuple[str, float], ...]]) -> go.Figure:
+    """Build the radar chart figure once per result and share it across reruns; callers must not modify it"""
+    import plotly.graph_objects as go
+    
+    scores = dict(score_items)
+    max_possible_scores = dict(max_items) if max_items else {}
     
     # Prepare data for radar chart
     categories = []
     values = []
     
-    for skill in skills_catalog:
-        skill_key = skill['key']
-        skill_label = skill['label']
+    for skill_key, skill_label in skills:
         score = scores.get(skill_key, 0)
-        max_possible = max_possible_scores.get(skill_key, 1) if quiz_questions else 1
+        max_possible = max_possible_scores.get(skill_key, 1) if max_items else 1
         
         categories.append(skill_label)
         # Calculate percentage of possible score for this competency
@@ -37,48 +41,49 @@ def create_radar_chart(scores: Dict[str, float], skills_catalog: List[Dict[str,
     categories_closed = categories + [categories[0]]
     values_closed = values + [values[0]]
     
-    # Create radar chart
-    fig = go.Figure()
-    
-    fig.add_trace(go.Scatterpolar(
-        r=values_closed,
-        theta=categories_closed,
-        fill='toself',
-        fillcolor='rgba(0, 123, 255, 0.2)',
-        line=dict(color='rgba(0, 123, 255, 1)', width=2),
-        marker=dict(color='rgba(0, 123, 255, 1)', size=8),
-        name='Your Performance'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 100],
-                tickmode='linear',
-                tick0=0,
-                dtick=20,
-                ticksuffix='%'
-            ),
-            angularaxis=dict(
-                tickfont=dict(size=12)
+    # Build the figure in one call so it is validated once
+    fig = go.Figure(
+        data=[
+            go.Scatterpolar(
+                r=values_closed,
+                theta=categories_closed,
+                fill='toself',
+                fillcolor='rgba(0, 123, 255, 0.2)',
+                line=dict(color='rgba(0, 123, 255, 1)', width=2),
+                marker=dict(color='rgba(0, 123, 255, 1)', size=8),
+                name='Your Performance'
             )
-        ),
-        showlegend=True,
-        title=dict(
-            text="Procurement Competency Assessment",
-            x=0.5,
-            font=dict(size=16)
-        ),
-        height=500,
-        margin=dict(l=50, r=50, t=80, b=50)
+        ],
+        layout=go.Layout(
+            polar=dict(
+                radialaxis=dict(
+                    visible=True,
+                    range=[0, 100],
+                    tickmode='linear',
+                    tick0=0,
+                    dtick=20,
+                    ticksuffix='%'
+                ),
+                angularaxis=dict(
+                    tickfont=dict(size=12)
+                )
+            ),
+            showlegend=True,
+            title=dict(
+                text="Procurement Competency Assessment",
+                x=0.5,
+                font=dict(size=16)
+            ),
+            height=500,
+            margin=dict(l=50, r=50, t=80, b=50)
+        )
     )
     
     return fig
 
 def create_performance_bar_chart(scores: Dict[str, float], skills_catalog: List[Dict[str, Any]]) -> go.Figure:
     """Create a bar chart showing competency scores (alternative visualization)"""
+    import plotly.graph_objects as go
     
     categories = []
     values = []
@@ -91,22 +96,23 @@ def create_performance_bar_chart(scores: Dict[str, float], skills_catalog: List[
         categories.append(skill_label)
         values.append(score)
     
-    fig = go.Figure(data=[
-        go.Bar(
-            x=categories,
-            y=values,
-            marker_color='rgba(0, 123, 255, 0.8)',
-            text=values,
-            textposition='auto',
+    fig = go.Figure(
+        data=[
+            go.Bar(
+                x=categories,
+                y=values,
+                marker_color='rgba(0, 123, 255, 0.8)',
+                text=values,
+                textposition='auto',
+            )
+        ],
+        layout=go.Layout(
+            title="Competency Scores",
+            xaxis_title="Competencies",
+            yaxis_title="Score",
+            height=400,
+            margin=dict(l=50, r=50, t=80, b=50)
         )
-    ])
-    
-    fig.update_layout(
-        title="Competency Scores",
-        xaxis_title="Competencies",
-        yaxis_title="Score",
-        height=400,
-        margin=dict(l=50, r=50, t=80, b=50)
     )
     
     return fig